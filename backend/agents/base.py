@@ -2,17 +2,54 @@
 Agent 基类 - LLM 驱动版本
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import asyncio
+import contextlib
 import json
 import logging
+import time
 
-from models.agent_models import AgentSignal
+from models.agent_models import AgentSignal, BatchSignals, MultiPersonaSignals
+from data.eastmoney import eastmoney_api
+from llm.client import acall_llm
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退标准库 json
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def dumps_json(obj: Any, indent: bool = True, default=None) -> str:
+    """
+    序列化 prompt 中的数据（orjson 优先，C 实现；中文原样输出）。
+    default 处理无法直接序列化的对象（如 pydantic 模型传 AgentSignal.model_dump）。
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option).decode()
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+# 输出 token 预算：每只股票约 160 token（≤80字中文推理 + JSON 结构），
+# 上限 4096（更大会触发非流式调用超时）
+MAX_OUTPUT_TOKENS = 4096
+_TOKENS_PER_SIGNAL = 160
+_TOKENS_BASE = 300
+
+
+def batch_max_tokens(n_signals: int) -> int:
+    """按需输出的信号条数估算 max_tokens，小批量时缩短解码时间"""
+    return min(MAX_OUTPUT_TOKENS, _TOKENS_BASE + _TOKENS_PER_SIGNAL * n_signals)
+
+
 class BaseAgent(ABC):
     """Agent 基类"""
     
@@ -20,7 +57,7 @@ class BaseAgent(ABC):
         self.name = name
         self.description = description
         self.last_analysis = None
-        self.analysis_history = []
+        self.analysis_history = deque(maxlen=100)   # 只保留最近 100 条，自动淘汰
         self.is_running = False
         
     @abstractmethod
@@ -31,25 +68,88 @@ class BaseAgent(ABC):
         """
         pass
         
-    def save_analysis(self, analysis: Dict[str, Any]):
-        """保存分析结果"""
+    def save_analysis(self, analysis: Dict[str, AgentSignal]):
+        """保存分析结果（直接保存 AgentSignal，需要序列化时再 model_dump）"""
         record = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp_ns": time.time_ns(),   # 展示时再格式化（get_status）
             "agent": self.name,
             "results": analysis,
         }
         self.last_analysis = record
         self.analysis_history.append(record)
-        if len(self.analysis_history) > 100:
-            self.analysis_history = self.analysis_history[-100:]
             
+    async def _get_quote(self, stock_code: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """优先使用 AgentManager 预取的行情（data["quotes"]），未命中再请求东财"""
+        quote = data.get("quotes", {}).get(stock_code)
+        if quote is None:
+            quote = await eastmoney_api.get_quote(stock_code)
+        return quote
+
+    @staticmethod
+    def _quote_fields(quote: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Agent prompt 使用的标准行情字段"""
+        if not quote:
+            return {"error": "行情获取失败"}
+        return {
+            "name": quote.get("name", ""),
+            "price": quote.get("price", 0),
+            "pe_ttm": quote.get("pe_ttm") or quote.get("pe"),   # TTM 缺失时退回静态 PE
+            "pb": quote.get("pb"),
+            "change_pct": quote.get("change_pct", 0),
+            "market_cap_b": quote.get("market_cap_b"),
+        }
+
+    async def _fetch_quote_fields(self, stock_code: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self._quote_fields(await self._get_quote(stock_code, data))
+        except Exception as e:
+            logger.warning(f"{self.name} 数据获取失败 {stock_code}: {e}")
+            return {"error": str(e)}
+
+    async def _quote_payload(self, target_stocks: List[str], data: Dict[str, Any]) -> Optional[str]:
+        """
+        prompt 中的行情 JSON。AgentManager 已统一序列化（data["quotes_json"]）时直接复用，
+        否则并发获取后自行序列化。所有股票都没有行情时返回 None（无需调用 LLM）。
+        """
+        payload, _ = await self._quote_data(target_stocks, data)
+        return payload
+
+    async def _quote_data(self, target_stocks: List[str], data: Dict[str, Any]) -> Tuple[Optional[str], List[str]]:
+        """同 _quote_payload，另外返回有可用行情的股票代码"""
+        payload = data.get("quotes_json")
+        if payload is not None:
+            quotes = data.get("quotes", {})
+            usable = [code for code in target_stocks if quotes.get(code)]
+            return (payload if usable else None), usable
+        results = dict(zip(target_stocks, await asyncio.gather(
+            *(self._fetch_quote_fields(code, data) for code in target_stocks)
+        )))
+        usable = [code for code, fields in results.items() if "error" not in fields]
+        return (dumps_json(results, indent=False) if usable else None), usable
+
+    @staticmethod
+    def _has_usable_data(all_data: Dict[str, Any]) -> bool:
+        """至少一只股票有数据（不是 {"error": ...}）才值得调用 LLM"""
+        return any(not (isinstance(v, dict) and "error" in v) for v in all_data.values())
+
+    @staticmethod
+    def _insufficient_signals(codes) -> Dict[str, AgentSignal]:
+        """数据全部缺失时直接返回的信号，跳过 LLM 调用"""
+        return {
+            code: AgentSignal.model_construct(signal="neutral", confidence=0, reasoning="数据不足")
+            for code in codes
+        }
+
     def get_status(self) -> Dict[str, Any]:
         """获取 Agent 状态"""
+        last_time = None
+        if self.last_analysis:
+            last_time = datetime.fromtimestamp(self.last_analysis["timestamp_ns"] / 1e9).isoformat()
         return {
             "name": self.name,
             "description": self.description,
             "is_running": self.is_running,
-            "last_analysis_time": self.last_analysis.get("timestamp") if self.last_analysis else None,
+            "last_analysis_time": last_time,
             "analysis_count": len(self.analysis_history),
         }
         
@@ -58,7 +158,7 @@ class BaseAgent(ABC):
         try:
             self.is_running = True
             results = await self.analyze(market_data)
-            self.save_analysis({k: v.model_dump() for k, v in results.items()})
+            self.save_analysis(results)
             return results
         except Exception as e:
             logger.error(f"Agent {self.name} analysis failed: {e}", exc_info=True)
@@ -67,6 +167,166 @@ class BaseAgent(ABC):
             self.is_running = False
 
 
+class LLMPersonaAgent(BaseAgent):
+    """
+    投资大师 Agent 通用实现：标准行情字段 + 人设 system prompt，1次 LLM 调用批量输出信号。
+    子类只需提供人设参数（system prompt、用户 prompt 前缀、兜底推理文案）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        system_prompt: str,
+        prompt_prefix: str,
+        default_reasoning: str,
+    ):
+        super().__init__(name=name, description=description)
+        self.system_prompt = system_prompt
+        self.prompt_prefix = prompt_prefix
+        self.default_reasoning = default_reasoning
+        self._prompt_head = f"{prompt_prefix}\n\n"   # 构造时拼好，调用时只做一次拼接
+
+    async def analyze(self, data: Dict[str, Any]) -> Dict[str, AgentSignal]:
+        target_stocks = data.get("target_stocks", [])
+        payload, usable = await self._quote_data(target_stocks, data)
+        if payload is None:
+            return self._insufficient_signals(target_stocks)
+        signals = await self._llm_batch_analyze(target_stocks, payload)
+        return self._complete_signals(signals, target_stocks, usable)
+
+    def _complete_signals(
+        self, signals: Dict[str, AgentSignal], target_stocks: List[str], usable: List[str]
+    ) -> Dict[str, AgentSignal]:
+        """
+        只保留给定股票的信号（丢弃 LLM 编造的代码）。LLM 漏掉的股票逐只补齐：
+        有行情的补该人设的中性兜底信号，无行情的补"数据不足"。
+        """
+        usable = set(usable)
+        completed: Dict[str, AgentSignal] = {}
+        missing = []
+        for code in dict.fromkeys(target_stocks):
+            signal = signals.get(code)
+            if signal is None:
+                if code in usable:
+                    missing.append(code)
+                    signal = AgentSignal.model_construct(signal="neutral", confidence=30, reasoning=self.default_reasoning)
+                else:
+                    signal = AgentSignal.model_construct(signal="neutral", confidence=0, reasoning="数据不足")
+            completed[code] = signal
+        if missing:
+            logger.warning(f"{self.name} 结果缺少股票 {missing}，以中性信号补齐")
+        return completed
+
+    async def _llm_batch_analyze(self, stocks: List[str], payload: str) -> Dict[str, AgentSignal]:
+        # 兜底值是自有常量，model_construct 跳过 Pydantic 校验
+        result = await acall_llm(
+            prompt=self._prompt_head + payload,
+            pydantic_model=BatchSignals,
+            system_prompt=self.system_prompt,
+            max_tokens=batch_max_tokens(len(stocks)),
+            default_factory=lambda: BatchSignals.model_construct(signals={
+                code: AgentSignal.model_construct(signal="neutral", confidence=30, reasoning=self.default_reasoning)
+                for code in stocks
+            }),
+        )
+        return result.signals
+
+
+MULTI_PERSONA_SYSTEM = """你同时扮演多位投资大师，分别用各自的投资原则分析同一批A股。
+每位大师的视角相互独立，不要互相参考结论。
+
+对每位大师、每只股票给出 bullish/bearish/neutral 信号、置信度(0-100)和简短中文推理(≤80字)。
+personas 的键必须是给定的人设名称，每个人设必须对所有给定股票代码返回信号。"""
+
+
+class MultiPersonaRunner:
+    """
+    多人设合并调用：行情数据只发送一次，各人设的 system prompt 作为分节列出，
+    1次 LLM 调用返回所有人设的信号。合并调用失败或某人设缺失时回退到该 Agent 单独调用。
+    传入 semaphore 时，每次合并调用和每个回退调用各占用一个配额。
+    """
+
+    def __init__(self, agents: List[LLMPersonaAgent], semaphore: Optional[asyncio.Semaphore] = None):
+        self.agents: Dict[str, LLMPersonaAgent] = {agent.name: agent for agent in agents}
+        self.semaphore = semaphore
+
+    @staticmethod
+    def _build_prompt(group: List[LLMPersonaAgent], payload: str) -> str:
+        sections = "\n\n".join(
+            f"== Persona: {agent.name} ==\n{agent.system_prompt}\n任务：{agent.prompt_prefix}"
+            for agent in group
+        )
+        return (
+            f"分别以以下 {len(group)} 位投资大师的视角，批量分析同一批A股：\n\n"
+            f"{sections}\n\n"
+            f"== 股票数据 ==\n{payload}"
+        )
+
+    async def run(self, market_data: Dict[str, Any]) -> Dict[str, Dict[str, AgentSignal]]:
+        agents = list(self.agents.values())
+        target_stocks = market_data.get("target_stocks", [])
+        payload, usable = await agents[0]._quote_data(target_stocks, market_data)
+        if payload is None:
+            # 没有任何可用行情：所有人设直接返回"数据不足"，不调用 LLM
+            results = {}
+            for name, agent in self.agents.items():
+                results[name] = agent._insufficient_signals(target_stocks)
+                agent.save_analysis(results[name])
+            return results
+
+        # 输出 token 上限内能容纳的人设数；放不下时按组合并，每组 1 次调用
+        per_call = max(1, (MAX_OUTPUT_TOKENS - _TOKENS_BASE) // (_TOKENS_PER_SIGNAL * max(1, len(target_stocks))))
+        groups = [agents[i:i + per_call] for i in range(0, len(agents), per_call)]
+        fused: Dict[str, BatchSignals] = {}
+        for personas in await asyncio.gather(
+            *(self._fused_call(group, payload, len(target_stocks)) for group in groups if len(group) > 1)
+        ):
+            fused.update(personas)
+
+        # 合并结果里完全没有某人设（或该人设没覆盖任何有行情的股票）时才回退单独调用；
+        # 个别股票缺失只逐只补中性信号，不整体重跑
+        results: Dict[str, Dict[str, AgentSignal]] = {}
+        fallback = []
+        for name, agent in self.agents.items():
+            batch = fused.get(name)
+            if batch is not None and any(code in batch.signals for code in usable):
+                results[name] = agent._complete_signals(batch.signals, target_stocks, usable)
+                agent.save_analysis(results[name])
+            else:
+                fallback.append(agent)
+
+        if fallback:
+            logger.info(f"以下人设单独调用: {[a.name for a in fallback]}")
+            signals = await asyncio.gather(*(self._fallback_call(agent, market_data) for agent in fallback))
+            results.update(zip((a.name for a in fallback), signals))
+        return results
+
+    async def _fused_call(
+        self, group: List[LLMPersonaAgent], payload: str, n_stocks: int
+    ) -> Dict[str, BatchSignals]:
+        try:
+            async with self._slot():
+                result = await acall_llm(
+                    prompt=self._build_prompt(group, payload),
+                    pydantic_model=MultiPersonaSignals,
+                    system_prompt=MULTI_PERSONA_SYSTEM,
+                    max_tokens=batch_max_tokens(len(group) * n_stocks),
+                )
+            return result.personas
+        except Exception as e:
+            logger.warning(f"多人设合并调用失败，回退逐个调用: {e}")
+            return {}
+
+    async def _fallback_call(self, agent: LLMPersonaAgent, market_data: Dict[str, Any]) -> Dict[str, AgentSignal]:
+        async with self._slot():
+            return await agent.run_analysis(market_data)
+
+    def _slot(self):
+        """LLM 调用配额：未传 semaphore 时不限流"""
+        return self.semaphore if self.semaphore is not None else contextlib.nullcontext()
+
+
 class AgentManager:
     """Agent 管理器"""
     
@@ -86,27 +346,83 @@ class AgentManager:
         self,
         market_data: Dict[str, Any],
         concurrency: int = 8,
+        fuse_personas: bool = True,
     ) -> Dict[str, Dict[str, AgentSignal]]:
         """
-        并发运行所有 Agent（asyncio.gather + Semaphore）。
-        concurrency=8 表示最多同时 8 个 LLM 调用，避免触发 429。
+        并发运行所有 Agent（Semaphore 限流，拿到配额才派发 task）。
+        运行前统一预取 target_stocks 的行情，避免每个 Agent 重复请求。
+        fuse_personas=True 时所有 LLMPersonaAgent 合并为 1 次 LLM 调用（MultiPersonaRunner）。
+        concurrency=8 表示最多同时 8 个 LLM 调用，避免触发 429；
+        人设的每组合并调用和每个单独回退调用同样各占一个配额。
         16 个 agent 原来串行约 240s，并发后预计 30-40s。
         """
+        # 统一预取行情：批量请求一次，注入 market_data["quotes"] 供所有 Agent 复用
+        codes = list(dict.fromkeys(market_data.get("target_stocks", [])))
+        if codes and "quotes" not in market_data:
+            # 一次批量请求取回所有代码（未命中的再逐只回退）
+            try:
+                market_data["quotes"] = await eastmoney_api.get_stock_quotes(codes)
+            except Exception as e:
+                logger.warning(f"批量预取行情失败: {e}")
+                market_data["quotes"] = {}
+            # 标准行情字段只序列化一次，所有 Agent 的 prompt 共用同一份 JSON
+            market_data["quotes_json"] = dumps_json(
+                {code: BaseAgent._quote_fields(market_data["quotes"].get(code)) for code in codes},
+                indent=False,
+            )
+
         semaphore = asyncio.Semaphore(concurrency)
+        merged: Dict[str, Dict[str, AgentSignal]] = {}
 
         async def _run_one(name: str, agent: "BaseAgent"):
-            async with semaphore:
-                logger.info(f"运行 Agent: {name}")
-                try:
-                    result = await agent.run_analysis(market_data)
-                    return name, result
-                except Exception as e:
-                    logger.error(f"Agent {name} 失败: {e}")
-                    return name, {}
-
-        tasks = [_run_one(name, agent) for name, agent in self.agents.items()]
-        pairs = await asyncio.gather(*tasks)
-        agent_results = dict(pairs)
+            logger.info(f"运行 Agent: {name}")
+            try:
+                merged[name] = await agent.run_analysis(market_data)
+            except Exception as e:
+                logger.error(f"Agent {name} 失败: {e}")
+                merged[name] = {}
+            finally:
+                semaphore.release()
+
+        personas = [a for a in self.agents.values() if isinstance(a, LLMPersonaAgent)]
+        if not fuse_personas or len(personas) < 2:
+            personas = []
+
+        async def _run_personas():
+            # 不整体占用配额：MultiPersonaRunner 内部每次 LLM 调用各自申请
+            logger.info(f"合并运行 {len(personas)} 个人设 Agent")
+            try:
+                merged.update(await MultiPersonaRunner(personas, semaphore).run(market_data))
+            except Exception as e:
+                logger.error(f"人设 Agent 合并运行失败: {e}")
+
+        jobs = [
+            (lambda n=name, a=agent: _run_one(n, a))
+            for name, agent in self.agents.items() if agent not in personas
+        ]
+
+        # 先拿到信号量再创建 task：同一时刻最多 concurrency 个 task 存活；
+        # 外部取消时一并取消已派发的 task（3.10 无 TaskGroup，手动实现结构化取消）
+        tasks = set()
+        try:
+            if personas:
+                task = asyncio.create_task(_run_personas())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            for job in jobs:
+                await semaphore.acquire()
+                task = asyncio.create_task(job())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(set(tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # 保持注册顺序
+        agent_results = {name: merged.get(name, {}) for name in self.agents}
         self.analysis_results = agent_results
         return agent_results
         
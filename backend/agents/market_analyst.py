@@ -2,16 +2,19 @@
 市场分析 Agent - 分析大盘走势，LLM 批量判断每只股票的市场环境（1次LLM调用）
 """
 from typing import Dict, Any
-import json
+import asyncio
 import logging
 
-from .base import BaseAgent
+from .base import BaseAgent, dumps_json, batch_max_tokens
 from models.agent_models import AgentSignal, BatchSignals
 from data.eastmoney import eastmoney_api
 from llm.client import acall_llm
 
 logger = logging.getLogger(__name__)
 
+# 单次 LLM 调用最多判断的股票数：20 只约 3500 输出 token，留在 4096 上限内
+_SHARD_SIZE = 20
+
 
 class MarketAnalyst(BaseAgent):
     def __init__(self):
@@ -23,14 +26,34 @@ class MarketAnalyst(BaseAgent):
     async def analyze(self, data: Dict[str, Any]) -> Dict[str, AgentSignal]:
         target_stocks = data.get("target_stocks", ["000001"])
         market_data = await self._fetch_market_data()
-        return await self._llm_batch_analyze(target_stocks, market_data)
+        # 大盘数据对所有分片相同，只序列化一次
+        market_json = dumps_json(market_data)
+        if len(target_stocks) <= _SHARD_SIZE:
+            return await self._llm_batch_analyze(target_stocks, market_json)
+
+        # 股票较多时按分片并发调用 LLM，每片输出更短、整体耗时取最慢一片
+        shards = [target_stocks[i:i + _SHARD_SIZE] for i in range(0, len(target_stocks), _SHARD_SIZE)]
+        results = await asyncio.gather(*(self._llm_batch_analyze(shard, market_json) for shard in shards))
+        signals: Dict[str, AgentSignal] = {}
+        for shard_signals in results:
+            signals.update(shard_signals)
+        return signals
 
     async def _fetch_market_data(self) -> Dict[str, Any]:
         result = {}
 
+        # 指数、市场统计、板块三个接口互不依赖，并发请求
+        quotes, stats, sectors = await asyncio.gather(
+            eastmoney_api.get_batch_quotes(["000001", "399001", "399006"]),
+            eastmoney_api.get_market_stats(),
+            eastmoney_api.get_sector_list(),
+            return_exceptions=True,
+        )
+
         # 主要指数
         try:
-            quotes = await eastmoney_api.get_batch_quotes(["000001", "399001", "399006"])
+            if isinstance(quotes, Exception):
+                raise quotes
             result["indices"] = {
                 code: {
                     "name": q.get("name", code),
@@ -44,43 +67,40 @@ class MarketAnalyst(BaseAgent):
             result["indices"] = {}
 
         # 市场统计
-        try:
-            stats = await eastmoney_api.get_market_stats()
-            result["market_stats"] = stats
-        except Exception as e:
-            logger.warning(f"市场统计获取失败: {e}")
+        if isinstance(stats, Exception):
+            logger.warning(f"市场统计获取失败: {stats}")
             result["market_stats"] = {}
+        else:
+            result["market_stats"] = stats
 
         # 板块数据
-        try:
-            sectors = await eastmoney_api.get_sector_list()
-            if sectors:
-                result["top_sectors"] = sectors[:5]
-        except Exception as e:
-            logger.warning(f"板块数据获取失败: {e}")
+        if isinstance(sectors, Exception):
+            logger.warning(f"板块数据获取失败: {sectors}")
             result["top_sectors"] = []
+        elif sectors:
+            result["top_sectors"] = sectors[:5]
 
         return result
 
-    async def _llm_batch_analyze(self, stocks: list, market_data: Dict) -> Dict[str, AgentSignal]:
+    async def _llm_batch_analyze(self, stocks: list, market_json: str) -> Dict[str, AgentSignal]:
         system_prompt = (
             "你是专业A股市场分析师。根据大盘环境数据，"
             "判断每只股票所处的市场环境（bullish/bearish/neutral），"
             "给出置信度(0-100)和简短中文推理(≤80字)。"
         )
         prompt = (
-            f"大盘市场数据：\n{json.dumps(market_data, ensure_ascii=False, indent=2)}\n\n"
+            f"大盘市场数据：\n{market_json}\n\n"
             f"请基于以上市场环境，对以下股票代码各自给出市场环境信号：\n"
-            f"{json.dumps(stocks, ensure_ascii=False)}"
+            f"{dumps_json(stocks, indent=False)}"
         )
 
         result = await acall_llm(
             prompt=prompt,
             pydantic_model=BatchSignals,
             system_prompt=system_prompt,
-            max_tokens=200000,
-            default_factory=lambda: BatchSignals(signals={
-                code: AgentSignal(signal="neutral", confidence=40, reasoning="市场分析暂时不可用")
+            max_tokens=batch_max_tokens(len(stocks)),
+            default_factory=lambda: BatchSignals.model_construct(signals={
+                code: AgentSignal.model_construct(signal="neutral", confidence=40, reasoning="市场分析暂时不可用")
                 for code in stocks
             }),
         )
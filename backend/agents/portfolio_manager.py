@@ -3,10 +3,10 @@ Portfolio Manager Agent - 收集所有 Agent 信号，LLM 做最终决策
 参考 ai-hedge-fund 的 portfolio_manager.py
 """
 from typing import Dict, Any
-import json
 import logging
 
-from .base import BaseAgent
+from .base import BaseAgent, dumps_json
+from config import config
 from models.agent_models import AgentSignal, PortfolioDecision, PortfolioOutput
 from llm.client import acall_llm
 
@@ -60,40 +60,39 @@ class PortfolioManager(BaseAgent):
         Returns:
             {stock_code: PortfolioDecision}
         """
-        # 收集所有涉及的股票代码
-        all_stocks = set()
-        for signals in agent_signals.values():
-            all_stocks.update(signals.keys())
+        # 一次遍历所有 Agent 信号，按股票归集（同时得到所有涉及的股票代码）
+        stock_summaries: Dict[str, Dict[str, Any]] = {}
+        for agent_name, signals in agent_signals.items():
+            for stock_code, sig in signals.items():
+                summary = stock_summaries.setdefault(stock_code, {})
+                # AgentSignal 原样放入，序列化 prompt 时再由 model_dump 转换（不逐字段拷贝）
+                if isinstance(sig, (AgentSignal, dict)):
+                    summary[agent_name] = sig
         
+        all_stocks = list(stock_summaries)
         if not all_stocks:
             return {}
         
-        # 为每只股票整理信号汇总
-        stock_summaries = {}
-        for stock_code in all_stocks:
-            summary = {}
-            for agent_name, signals in agent_signals.items():
-                if stock_code in signals:
-                    sig = signals[stock_code]
-                    if isinstance(sig, AgentSignal):
-                        summary[agent_name] = {
-                            "signal": sig.signal,
-                            "confidence": sig.confidence,
-                            "reasoning": sig.reasoning,
-                        }
-                    elif isinstance(sig, dict):
-                        summary[agent_name] = sig
-            
-            # 加入风险限制
-            if risk_limits and stock_code in risk_limits:
-                summary["risk_limits"] = risk_limits[stock_code]
-            
-            stock_summaries[stock_code] = summary
+        # 所有分析师都没有明确观点时 LLM 只会给出 hold，直接返回
+        if config.PORTFOLIO_SKIP_NEUTRAL and self._all_low_conviction_neutral(stock_summaries):
+            logger.info("所有分析师信号均为低置信度 neutral，跳过 LLM 决策")
+            return {
+                code: PortfolioDecision.model_construct(
+                    action="hold", quantity=0, confidence=50,
+                    reasoning="所有分析师均为中性、无明确观点，维持持有"
+                )
+                for code in all_stocks
+            }
         
-        # 构建 LLM prompt
-        portfolio_info = json.dumps(portfolio or {"cash": 1000000, "positions": []}, 
-                                     ensure_ascii=False, indent=2)
-        signals_info = json.dumps(stock_summaries, ensure_ascii=False, indent=2)
+        # 加入风险限制
+        if risk_limits:
+            for stock_code, summary in stock_summaries.items():
+                if stock_code in risk_limits:
+                    summary["risk_limits"] = risk_limits[stock_code]
+        
+        # 构建 LLM prompt（紧凑 JSON：16 个 Agent × N 只股票的汇总去掉缩进可省大量 token）
+        portfolio_info = dumps_json(portfolio or {"cash": 1000000, "positions": []}, indent=False)
+        signals_info = dumps_json(stock_summaries, indent=False, default=AgentSignal.model_dump)
         
         prompt = (
             f"当前持仓情况:\n{portfolio_info}\n\n"
@@ -106,9 +105,9 @@ class PortfolioManager(BaseAgent):
                 prompt=prompt,
                 pydantic_model=PortfolioOutput,
                 system_prompt=PORTFOLIO_SYSTEM_PROMPT,
-                default_factory=lambda: PortfolioOutput(
+                default_factory=lambda: PortfolioOutput.model_construct(
                     decisions={
-                        code: PortfolioDecision(
+                        code: PortfolioDecision.model_construct(
                             action="hold", quantity=0, confidence=30,
                             reasoning="LLM 决策超时，默认持有"
                         )
@@ -121,13 +120,27 @@ class PortfolioManager(BaseAgent):
         except Exception as e:
             logger.error(f"Portfolio decision failed: {e}")
             return {
-                code: PortfolioDecision(
+                code: PortfolioDecision.model_construct(
                     action="hold", quantity=0, confidence=0,
                     reasoning=f"决策失败: {e}"
                 )
                 for code in all_stocks
             }
     
+    @staticmethod
+    def _all_low_conviction_neutral(stock_summaries: Dict[str, Dict[str, Any]]) -> bool:
+        """所有股票的所有信号都是 neutral 且置信度低于阈值"""
+        limit = config.PORTFOLIO_NEUTRAL_MAX_CONFIDENCE
+        for summary in stock_summaries.values():
+            for sig in summary.values():
+                if isinstance(sig, AgentSignal):
+                    signal, confidence = sig.signal, sig.confidence
+                else:
+                    signal, confidence = sig.get("signal"), sig.get("confidence") or 0
+                if signal != "neutral" or confidence >= limit:
+                    return False
+        return True
+    
     async def analyze(self, data: Dict[str, Any]) -> Dict[str, AgentSignal]:
         """
         兼容 BaseAgent 接口。
@@ -3,15 +3,40 @@
 参考 ai-hedge-fund 的 risk_manager.py
 """
 from typing import Dict, Any
+import asyncio
 import logging
+import math
 import numpy as np
 import pandas as pd
 
 from .base import BaseAgent
 from models.agent_models import AgentSignal
+from data.eastmoney import eastmoney_api
 
 logger = logging.getLogger(__name__)
 
+SQRT_252 = math.sqrt(252)  # 日波动率 → 年化波动率
+
+# 仓位上限分段表：年化波动率分界点 + 每段 (起点, 起始系数, 斜率, 系数下限)
+# 段内系数 = max(起始系数 - (波动率 - 起点) × 斜率, 系数下限)，仓位上限 = 基础仓位 × 系数
+_BASE_POSITION_LIMIT = 0.20
+_VOL_BANDS = np.array([0.15, 0.30, 0.50])
+_LIMIT_TABLE = np.array([
+    (0.00, 1.25, 0.0, 1.25),   # < 15%：25%
+    (0.15, 1.00, 0.5, 0.50),   # 15% ~ 30%
+    (0.30, 0.75, 0.5, 0.25),   # 30% ~ 50%
+    (0.50, 0.25, 0.0, 0.25),   # ≥ 50%：5%
+])
+
+# 风险信号分段（与仓位上限同一组分界点，但按「高于」分界点判定）：≤15% / ≤30% / ≤50% / >50%
+_RISK_SIGNALS = ("bullish", "neutral", "bearish", "bearish")
+_RISK_REASONS = (
+    "波动率较低({vol:.1%})，风险可控，仓位上限{limit:.1%}",
+    "波动率适中({vol:.1%})，仓位上限{limit:.1%}",
+    "波动率偏高({vol:.1%})，建议控制仓位，上限{limit:.1%}",
+    "波动率极高({vol:.1%})，建议大幅降低仓位，仓位上限{limit:.1%}",
+)
+
 
 class RiskManager(BaseAgent):
     """风险管理 Agent：纯规则计算波动率、相关性等风险指标，输出仓位限制"""
@@ -31,18 +56,42 @@ class RiskManager(BaseAgent):
         输出 AgentSignal（bearish = 高风险，bullish = 低风险可加仓）。
         同时在 data["risk_limits"] 中写入每只股票的仓位限制。
         """
-        target_stocks = data.get("target_stocks", ["000001"])
+        target_stocks = data.get("target_stocks", [])
+        if not target_stocks:
+            # 未指定标的：不再默认分析 000001，直接返回空结果
+            data.setdefault("risk_limits", {})
+            return {}
+        
         portfolio = data.get("portfolio", {})
         results = {}
         risk_limits = {}
         
-        for stock_code in target_stocks:
+        # 1. 并发拉取 K 线计算波动率（耗时在网络 I/O，numpy 计算是微秒级）
+        all_vols = await asyncio.gather(
+            *(self._calculate_volatility(code) for code in target_stocks), return_exceptions=True
+        )
+        
+        # 2. 波动率调整的仓位限制：所有股票一次查表计算（失败的股票占位 NaN，结果不使用）
+        ann_vols = np.array([
+            np.nan if isinstance(v, Exception) else v.get("annualized_volatility", 0.25) for v in all_vols
+        ])
+        limits = self._volatility_adjusted_limits(ann_vols)
+        
+        # 3. 风险信号分段与置信度同样一次向量计算，循环里只剩格式化推理文案
+        bands = np.searchsorted(_VOL_BANDS, ann_vols, side="left")
+        confidences = np.select(
+            [bands == 0, bands == 1, bands == 2],
+            [60 + (0.15 - ann_vols) * 200, 50, 50 + (ann_vols - 0.30) * 200],
+            default=np.minimum(ann_vols * 100, 90),
+        )
+        
+        # 4. 逐只股票输出信号与仓位限制
+        for stock_code, vol_data, ann_vol, limit_pct, band, confidence in zip(
+            target_stocks, all_vols, ann_vols.tolist(), limits.tolist(), bands.tolist(), confidences.tolist()
+        ):
             try:
-                vol_data = await self._calculate_volatility(stock_code)
-                
-                # 波动率调整的仓位限制
-                ann_vol = vol_data.get("annualized_volatility", 0.25)
-                limit_pct = self._volatility_adjusted_limit(ann_vol)
+                if isinstance(vol_data, Exception):
+                    raise vol_data
                 
                 risk_limits[stock_code] = {
                     "position_limit_pct": limit_pct,
@@ -50,28 +99,10 @@ class RiskManager(BaseAgent):
                     "daily_volatility": vol_data.get("daily_volatility", 0.02),
                 }
                 
-                # 风险信号
-                if ann_vol > 0.50:
-                    signal = "bearish"
-                    confidence = min(int(ann_vol * 100), 90)
-                    reasoning = f"波动率极高({ann_vol:.1%})，建议大幅降低仓位，仓位上限{limit_pct:.1%}"
-                elif ann_vol > 0.30:
-                    signal = "bearish"
-                    confidence = int(50 + (ann_vol - 0.30) * 200)
-                    reasoning = f"波动率偏高({ann_vol:.1%})，建议控制仓位，上限{limit_pct:.1%}"
-                elif ann_vol > 0.15:
-                    signal = "neutral"
-                    confidence = 50
-                    reasoning = f"波动率适中({ann_vol:.1%})，仓位上限{limit_pct:.1%}"
-                else:
-                    signal = "bullish"
-                    confidence = int(60 + (0.15 - ann_vol) * 200)
-                    reasoning = f"波动率较低({ann_vol:.1%})，风险可控，仓位上限{limit_pct:.1%}"
-                
                 results[stock_code] = AgentSignal(
-                    signal=signal,
-                    confidence=min(confidence, 95),
-                    reasoning=reasoning,
+                    signal=_RISK_SIGNALS[band],
+                    confidence=min(int(confidence), 95),
+                    reasoning=_RISK_REASONS[band].format(vol=ann_vol, limit=limit_pct),
                 )
                 
             except Exception as e:
@@ -89,21 +120,21 @@ class RiskManager(BaseAgent):
         
     async def _calculate_volatility(self, stock_code: str) -> Dict[str, float]:
         """计算波动率指标"""
-        from data.eastmoney import eastmoney_api
         
-        klines = await eastmoney_api.get_kline_data(stock_code, "101", 60)
+        closes = await eastmoney_api.get_kline_closes(stock_code, "101", 60)
         
-        if not klines or len(klines) < 10:
+        if len(closes) < 10:
             return {
                 "daily_volatility": 0.03,
-                "annualized_volatility": 0.03 * np.sqrt(252),
+                "annualized_volatility": 0.03 * SQRT_252,
             }
         
-        closes = np.array([k["close"] for k in klines])
-        returns = np.diff(closes) / closes[:-1]
+        # 收益率原地相除，不改动缓存里的收盘价数组
+        returns = np.diff(closes)
+        returns /= closes[:-1]
         
-        daily_vol = float(np.std(returns))
-        ann_vol = daily_vol * np.sqrt(252)
+        daily_vol = float(returns.std())
+        ann_vol = daily_vol * SQRT_252
         
         return {
             "daily_volatility": daily_vol,
@@ -113,15 +144,11 @@ class RiskManager(BaseAgent):
     
     def _volatility_adjusted_limit(self, annualized_volatility: float) -> float:
         """根据波动率计算仓位上限百分比"""
-        base = 0.20
-        
-        if annualized_volatility < 0.15:
-            return base * 1.25  # 25%
-        elif annualized_volatility < 0.30:
-            factor = 1.0 - (annualized_volatility - 0.15) * 0.5
-            return base * max(factor, 0.50)
-        elif annualized_volatility < 0.50:
-            factor = 0.75 - (annualized_volatility - 0.30) * 0.5
-            return base * max(factor, 0.25)
-        else:
-            return base * 0.25  # 5%
+        return float(self._volatility_adjusted_limits(np.array([annualized_volatility]))[0])
+    
+    def _volatility_adjusted_limits(self, annualized_volatilities: np.ndarray) -> np.ndarray:
+        """向量化版本：一次计算多只股票的仓位上限百分比"""
+        start, factor, slope, floor = _LIMIT_TABLE[
+            np.searchsorted(_VOL_BANDS, annualized_volatilities, side="right")
+        ].T
+        return _BASE_POSITION_LIMIT * np.maximum(factor - (annualized_volatilities - start) * slope, floor)
@@ -2,11 +2,12 @@
 情绪分析 Agent - 获取市场情绪数据，LLM 批量分析（1次LLM调用）
 """
 from typing import Dict, Any
-import json
+import asyncio
 import logging
 
-from .base import BaseAgent
+from .base import BaseAgent, dumps_json, batch_max_tokens
 from models.agent_models import AgentSignal, BatchSignals
+from data.eastmoney import eastmoney_api
 from llm.client import acall_llm
 
 logger = logging.getLogger(__name__)
@@ -25,31 +26,34 @@ class SentimentAnalyst(BaseAgent):
         return await self._llm_batch_analyze(target_stocks, sentiment_data)
 
     async def _fetch_market_sentiment(self) -> Dict[str, Any]:
-        from data.eastmoney import eastmoney_api
         result = {}
 
-        try:
-            stats = await eastmoney_api.get_market_stats()
+        # 市场统计与板块数据互不依赖，并发请求
+        stats, sectors = await asyncio.gather(
+            eastmoney_api.get_market_stats(),
+            eastmoney_api.get_sector_list(),
+            return_exceptions=True,
+        )
+
+        if isinstance(stats, Exception):
+            logger.warning(f"市场统计获取失败: {stats}")
+            result["market_stats"] = {}
+        else:
             result["market_stats"] = {
                 "up_count": stats.get("up_count", 0),
                 "down_count": stats.get("down_count", 0),
                 "limit_up": stats.get("limit_up", 0),
                 "limit_down": stats.get("limit_down", 0),
             }
-        except Exception as e:
-            logger.warning(f"市场统计获取失败: {e}")
-            result["market_stats"] = {}
 
-        try:
-            sectors = await eastmoney_api.get_sector_list()
-            if sectors:
-                result["hot_sectors"] = [
-                    {"name": s.get("name", ""), "change_pct": s.get("change_pct", 0)}
-                    for s in sectors[:5]
-                ]
-        except Exception as e:
-            logger.warning(f"板块数据获取失败: {e}")
+        if isinstance(sectors, Exception):
+            logger.warning(f"板块数据获取失败: {sectors}")
             result["hot_sectors"] = []
+        elif sectors:
+            result["hot_sectors"] = [
+                {"name": s.get("name", ""), "change_pct": s.get("change_pct", 0)}
+                for s in sectors[:5]
+            ]
 
         return result
 
@@ -60,17 +64,17 @@ class SentimentAnalyst(BaseAgent):
             "给出置信度(0-100)和简短中文推理(≤80字)。"
         )
         prompt = (
-            f"市场情绪数据：\n{json.dumps(sentiment_data, ensure_ascii=False, indent=2)}\n\n"
-            f"请基于市场情绪对以下股票批量给出信号：\n{json.dumps(stocks)}"
+            f"市场情绪数据：\n{dumps_json(sentiment_data)}\n\n"
+            f"请基于市场情绪对以下股票批量给出信号：\n{dumps_json(stocks, indent=False)}"
         )
 
         result = await acall_llm(
             prompt=prompt,
             pydantic_model=BatchSignals,
             system_prompt=system_prompt,
-            max_tokens=200000,
-            default_factory=lambda: BatchSignals(signals={
-                code: AgentSignal(signal="neutral", confidence=35, reasoning="情绪分析暂时不可用")
+            max_tokens=batch_max_tokens(len(stocks)),
+            default_factory=lambda: BatchSignals.model_construct(signals={
+                code: AgentSignal.model_construct(signal="neutral", confidence=35, reasoning="情绪分析暂时不可用")
                 for code in stocks
             }),
         )
@@ -2,12 +2,13 @@
 技术分析 Agent - 规则计算指标，LLM 批量解读所有股票信号（1次LLM调用）
 """
 from typing import Dict, Any
-import json
+import asyncio
 import logging
 import numpy as np
 
-from .base import BaseAgent
+from .base import BaseAgent, dumps_json, batch_max_tokens
 from models.agent_models import AgentSignal, BatchSignals
+from data.eastmoney import eastmoney_api
 from utils.indicators import TechnicalIndicators
 from llm.client import acall_llm
 
@@ -26,23 +27,25 @@ class TechnicalAnalyst(BaseAgent):
         target_stocks = data.get("target_stocks", ["000001"])
 
         # 1. 规则计算所有股票指标
+        results = await asyncio.gather(
+            *(self._compute_indicators(code) for code in target_stocks), return_exceptions=True
+        )
         all_indicators = {}
-        for code in target_stocks:
-            try:
-                ind = await self._compute_indicators(code)
-                if ind:
-                    all_indicators[code] = ind
-                else:
-                    all_indicators[code] = {"error": "K线数据不足"}
-            except Exception as e:
-                logger.warning(f"获取 {code} 技术指标失败: {e}")
-                all_indicators[code] = {"error": str(e)}
+        for code, ind in zip(target_stocks, results):
+            if isinstance(ind, Exception):
+                logger.warning(f"获取 {code} 技术指标失败: {ind}")
+                all_indicators[code] = {"error": str(ind)}
+            elif ind:
+                all_indicators[code] = ind
+            else:
+                all_indicators[code] = {"error": "K线数据不足"}
 
-        # 2. 一次 LLM 调用解读所有股票
+        # 2. 一次 LLM 调用解读所有股票（全部缺数据时跳过）
+        if not self._has_usable_data(all_indicators):
+            return self._insufficient_signals(all_indicators)
         return await self._llm_batch_interpret(all_indicators)
 
     async def _compute_indicators(self, stock_code: str) -> Dict[str, Any] | None:
-        from data.eastmoney import eastmoney_api
         try:
             klines = await eastmoney_api.get_kline_data(stock_code, "101", 100)
         except Exception as e:
@@ -87,16 +90,16 @@ class TechnicalAnalyst(BaseAgent):
         )
         prompt = (
             f"请分析以下股票的技术指标并批量返回信号：\n\n"
-            f"{json.dumps(all_indicators, ensure_ascii=False, indent=2)}"
+            f"{dumps_json(all_indicators)}"
         )
 
         result = await acall_llm(
             prompt=prompt,
             pydantic_model=BatchSignals,
             system_prompt=system_prompt,
-            max_tokens=200000,
-            default_factory=lambda: BatchSignals(signals={
-                code: AgentSignal(signal="neutral", confidence=30, reasoning="技术分析暂时不可用")
+            max_tokens=batch_max_tokens(len(all_indicators)),
+            default_factory=lambda: BatchSignals.model_construct(signals={
+                code: AgentSignal.model_construct(signal="neutral", confidence=30, reasoning="技术分析暂时不可用")
                 for code in all_indicators
             }),
         )
@@ -41,6 +41,9 @@ class Config:
     # Agent配置
     ANALYSIS_INTERVAL = 300    # 分析间隔秒数
     MAX_STOCKS_TO_ANALYZE = 50 # 最多分析股票数量
+    # 所有信号都是低置信度 neutral 时，Portfolio Manager 直接给出 hold，跳过 LLM 调用
+    PORTFOLIO_SKIP_NEUTRAL = os.getenv("PORTFOLIO_SKIP_NEUTRAL", "True").lower() == "true"
+    PORTFOLIO_NEUTRAL_MAX_CONFIDENCE = 40   # 置信度低于此值才视为“无观点”
     
     # Agent 权重配置（用于信号汇总参考）
     AGENT_WEIGHTS = {
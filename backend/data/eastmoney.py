@@ -5,8 +5,12 @@ import logging
 import os
 import re
 import time
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Optional, Any
+
+import numpy as np
+
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -16,6 +20,9 @@ logger = logging.getLogger(__name__)
 _QUOTE_CACHE: Dict[str, tuple] = {}   # {code: (timestamp, data)}
 _SECTOR_CACHE: tuple = (0, None)      # (timestamp, data)
 _CACHE_TTL = 60                        # 60 秒内复用缓存
+_QUOTE_INFLIGHT: Dict[str, asyncio.Future] = {}  # {code: future}，合并同一代码的并发请求
+_MARKET_CACHE: Dict[str, tuple] = {}               # 市场级接口（统计/资金流）{key: (timestamp, data)}
+_MARKET_INFLIGHT: Dict[str, asyncio.Future] = {}   # {key: future}
 
 # ── 持久化板块缓存（JSON 文件）────────────────────────────────────────────
 # 当所有 API 都失败时（如周末），返回上次成功获取的数据
@@ -88,6 +95,11 @@ def _load_universe_cache(sort_by: str, max_age_sec: int = 3 * 86400) -> Optional
 _SHARED_SESSION: Optional[aiohttp.ClientSession] = None
 _REQUEST_SEMAPHORE: Optional[asyncio.Semaphore] = None
 
+# 漏桶限速：所有经 _make_session() 发出的请求共享，相邻请求至少间隔 1/_MAX_RPS 秒。
+# 周度选股扫描约 5500 只 / 90s ≈ 61 rps，上限留有余量，只削平突发。
+_MAX_RPS = 100
+_NEXT_SLOT = 0.0
+
 
 def _create_raw_session() -> aiohttp.ClientSession:
     """创建不走代理的 aiohttp session（解决本地代理干扰问题）"""
@@ -96,6 +108,7 @@ def _create_raw_session() -> aiohttp.ClientSession:
         limit=64,             # 全局连接上限，配合 24 并发请求使用
         limit_per_host=24,    # 单 host 限制（与 _REQUEST_SEMAPHORE 一致）
         enable_cleanup_closed=True,
+        ttl_dns_cache=300,    # 东财/新浪/腾讯 host 固定，DNS 结果缓存 5 分钟（默认 10s）
     )
     timeout = aiohttp.ClientTimeout(total=20)
     return aiohttp.ClientSession(trust_env=False, connector=connector, timeout=timeout)
@@ -121,14 +134,29 @@ def _get_semaphore() -> asyncio.Semaphore:
     return _REQUEST_SEMAPHORE
 
 
+async def _pace():
+    """按 _MAX_RPS 分配发送时间片，时间片未到则等待（单事件循环内无需加锁）"""
+    global _NEXT_SLOT
+    now = asyncio.get_running_loop().time()
+    slot = max(now, _NEXT_SLOT)
+    _NEXT_SLOT = slot + 1.0 / _MAX_RPS
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
 class _SharedSessionCtx:
     """
     兼容 async with _make_session() as session: 语法的包装器。
-    使用共享 session + 信号量限流，不会在退出时关闭 session。
+    使用共享 session + 信号量限流 + 漏桶限速，不会在退出时关闭 session。
     """
     async def __aenter__(self) -> aiohttp.ClientSession:
         self._sem = _get_semaphore()
         await self._sem.acquire()
+        try:
+            await _pace()
+        except BaseException:
+            self._sem.release()
+            raise
         return _get_shared_session()
 
     async def __aexit__(self, *args):
@@ -140,6 +168,34 @@ def _make_session() -> _SharedSessionCtx:
     return _SharedSessionCtx()
 
 
+async def _cached_market_call(key: str, fetch):
+    """
+    市场级接口的 60s 缓存 + 并发去重：同一轮分析中多个 Agent / 接口请求同一份
+    市场统计或资金流时只发一次 HTTP。空结果（获取失败）不缓存，下次重新请求。
+    """
+    hit = _MARKET_CACHE.get(key)
+    if hit is not None and time.time() - hit[0] < _CACHE_TTL:
+        return hit[1]
+
+    pending = _MARKET_INFLIGHT.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    fut = asyncio.get_running_loop().create_future()
+    _MARKET_INFLIGHT[key] = fut
+    try:
+        result = await fetch()
+    except BaseException:
+        fut.set_result({})   # 等待方按获取失败处理
+        raise
+    finally:
+        _MARKET_INFLIGHT.pop(key, None)
+    if result:
+        _MARKET_CACHE[key] = (time.time(), result)
+    fut.set_result(result)
+    return result
+
+
 class EastmoneyAPI:
     """东方财富API接口"""
     
@@ -171,6 +227,45 @@ class EastmoneyAPI:
         except (TypeError, ValueError):
             return default
 
+    # ulist.np 行情字段:
+    # f12=代码 f14=名称 f2=现价 f3=涨跌% f4=涨跌额
+    # f15=最高 f16=最低 f17=开盘 f18=昨收
+    # f5=成交量(手) f6=成交额 f8=换手率
+    # f9=PE静 f115=PETTM f23=PB
+    # f20=总市值(元) f21=流通市值(元)
+    _QUOTE_FIELDS = "f12,f14,f2,f3,f4,f5,f6,f8,f15,f16,f17,f18,f9,f115,f23,f20,f21"
+    _QUOTE_BATCH = 100   # 批量行情单次请求的 secid 数上限
+
+    def _parse_quote_item(self, d: Dict, code: str) -> Dict:
+        """ulist.np（fltt=2）单条记录 → 标准行情字典"""
+        price     = self._safe_float(d.get("f2"), 0) or 0
+        high      = self._safe_float(d.get("f15"), price) or price
+        low       = self._safe_float(d.get("f16"), price) or price
+        pre_close = self._safe_float(d.get("f18"), price) or price
+        amplitude = round((high - low) / pre_close * 100, 2) if pre_close else 0
+
+        return {
+            "code":       d.get("f12", code),
+            "name":       d.get("f14", ""),
+            "price":      price,
+            "high":       high,
+            "low":        low,
+            "open":       self._safe_float(d.get("f17"), price) or price,
+            "pre_close":  pre_close,
+            "volume":     int(d.get("f5") or 0),
+            "amount":     self._safe_float(d.get("f6"), 0) or 0,
+            "turnover_rate": self._safe_float(d.get("f8")),
+            "change_pct": self._safe_float(d.get("f3"), 0) or 0,
+            "change":     self._safe_float(d.get("f4"), 0) or 0,
+            "amplitude":  amplitude,
+            # 基本面（fltt=2 直接返回真实值）
+            "pe":         self._safe_float(d.get("f9")),    # PE 静
+            "pe_ttm":     self._safe_float(d.get("f115")),  # PE TTM
+            "pb":         self._safe_float(d.get("f23")),   # PB
+            "market_cap_b":       round((d.get("f20") or 0) / 1e8, 2) or None,
+            "float_market_cap_b": round((d.get("f21") or 0) / 1e8, 2) or None,
+        }
+
     async def get_stock_quote(self, code: str) -> Optional[Dict]:
         """获取个股实时行情（含 PE/PB/市值基本面数据）
         
@@ -178,6 +273,7 @@ class EastmoneyAPI:
         - fltt=2 返回已处理的浮点值（不再需要 ÷100）
         - f9/f23/f115 在此接口能正确返回 PE/PB 数据
         - 内置 60s 缓存：16 个并发 Agent 共享同一次 API 调用结果
+        - 并发去重：缓存未命中时，同一代码的并发请求只发一次 HTTP，其余等待其结果
         """
         # ── 缓存命中检查 ───────────────────────────────
         now = time.time()
@@ -186,18 +282,29 @@ class EastmoneyAPI:
             if now - ts < _CACHE_TTL:
                 return cached
 
+        # ── 已有同代码请求在途：直接等待其结果（shield 防止等待方取消连带取消请求）──
+        pending = _QUOTE_INFLIGHT.get(code)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        fut = asyncio.get_running_loop().create_future()
+        _QUOTE_INFLIGHT[code] = fut
+        try:
+            result = await self._fetch_stock_quote(code)
+        except BaseException:
+            fut.set_result(None)   # 等待方按获取失败处理
+            raise
+        finally:
+            _QUOTE_INFLIGHT.pop(code, None)
+        fut.set_result(result)
+        return result
+
+    async def _fetch_stock_quote(self, code: str) -> Optional[Dict]:
+        """实际请求个股行情：东财优先，失败回退新浪（结果写入缓存）"""
         secid = self._parse_secid(code)
 
-        # fields:
-        # f12=代码 f14=名称 f2=现价 f3=涨跌% f4=涨跌额
-        # f15=最高 f16=最低 f17=开盘 f18=昨收
-        # f5=成交量(手) f6=成交额 f8=换手率
-        # f9=PE静 f115=PETTM f23=PB
-        # f20=总市值(元) f21=流通市值(元)
         url = (f"https://push2.eastmoney.com/api/qt/ulist.np/get"
-               f"?secids={secid}"
-               f"&fields=f12,f14,f2,f3,f4,f5,f6,f8,f15,f16,f17,f18,f9,f115,f23,f20,f21"
-               f"&fltt=2&ut={self.ut}")
+               f"?secids={secid}&fields={self._QUOTE_FIELDS}&fltt=2&ut={self.ut}")
 
         try:
             async with _make_session() as session:
@@ -206,35 +313,7 @@ class EastmoneyAPI:
                     diff = (data.get("data") or {}).get("diff") or []
                     if not diff:
                         return None
-                    d = diff[0]
-
-                    price     = self._safe_float(d.get("f2"), 0) or 0
-                    high      = self._safe_float(d.get("f15"), price) or price
-                    low       = self._safe_float(d.get("f16"), price) or price
-                    pre_close = self._safe_float(d.get("f18"), price) or price
-                    amplitude = round((high - low) / pre_close * 100, 2) if pre_close else 0
-
-                    result = {
-                        "code":       d.get("f12", code),
-                        "name":       d.get("f14", ""),
-                        "price":      price,
-                        "high":       high,
-                        "low":        low,
-                        "open":       self._safe_float(d.get("f17"), price) or price,
-                        "pre_close":  pre_close,
-                        "volume":     int(d.get("f5") or 0),
-                        "amount":     self._safe_float(d.get("f6"), 0) or 0,
-                        "turnover_rate": self._safe_float(d.get("f8")),
-                        "change_pct": self._safe_float(d.get("f3"), 0) or 0,
-                        "change":     self._safe_float(d.get("f4"), 0) or 0,
-                        "amplitude":  amplitude,
-                        # 基本面（fltt=2 直接返回真实值）
-                        "pe":         self._safe_float(d.get("f9")),    # PE 静
-                        "pe_ttm":     self._safe_float(d.get("f115")),  # PE TTM
-                        "pb":         self._safe_float(d.get("f23")),   # PB
-                        "market_cap_b":       round((d.get("f20") or 0) / 1e8, 2) or None,
-                        "float_market_cap_b": round((d.get("f21") or 0) / 1e8, 2) or None,
-                    }
+                    result = self._parse_quote_item(diff[0], code)
                     _QUOTE_CACHE[code] = (time.time(), result)   # 写入缓存
                     return result
         except Exception as e:
@@ -246,6 +325,63 @@ class EastmoneyAPI:
             _QUOTE_CACHE[code] = (time.time(), result)
         return result
 
+    async def get_stock_quotes(self, codes: List[str]) -> Dict[str, Dict]:
+        """批量获取个股实时行情（字段同 get_stock_quote）
+
+        - 缓存命中的代码直接返回
+        - 其余代码用一次 ulist.np 多 secid 请求取回（每批最多 _QUOTE_BATCH 只），结果写入缓存
+        - 批量接口未返回的代码再逐个走 get_stock_quote（含新浪回退）
+        返回 {code: quote}，获取失败的代码不在结果中。
+        """
+        now = time.time()
+        result: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for code in dict.fromkeys(codes):
+            hit = _QUOTE_CACHE.get(code)
+            if hit is not None and now - hit[0] < _CACHE_TTL:
+                result[code] = hit[1]
+            else:
+                missing.append(code)
+
+        if missing:
+            chunks = [missing[i:i + self._QUOTE_BATCH] for i in range(0, len(missing), self._QUOTE_BATCH)]
+            for fetched in await asyncio.gather(*(self._fetch_quote_chunk(c) for c in chunks)):
+                result.update(fetched)
+
+            rest = [code for code in missing if code not in result]
+            if rest:
+                quotes = await asyncio.gather(
+                    *(self.get_stock_quote(code) for code in rest), return_exceptions=True
+                )
+                for code, quote in zip(rest, quotes):
+                    if isinstance(quote, dict):
+                        result[code] = quote
+        return result
+
+    async def _fetch_quote_chunk(self, codes: List[str]) -> Dict[str, Dict]:
+        """一次 ulist.np 请求获取多只股票行情并写入缓存；失败返回已解析的部分"""
+        by_pure: Dict[str, List[str]] = {}
+        for code in codes:
+            by_pure.setdefault(code.split(".")[0], []).append(code)
+        secids = ",".join(self._parse_secid(code) for code in codes)
+        url = (f"https://push2.eastmoney.com/api/qt/ulist.np/get"
+               f"?secids={secids}&fields={self._QUOTE_FIELDS}&fltt=2&ut={self.ut}")
+
+        result: Dict[str, Dict] = {}
+        try:
+            async with _make_session() as session:
+                async with session.get(url, headers=self.headers) as resp:
+                    data = await resp.json(content_type=None)
+            ts = time.time()
+            for d in (data.get("data") or {}).get("diff") or []:
+                for code in by_pure.get(str(d.get("f12", "")), ()):
+                    quote = self._parse_quote_item(d, code)
+                    _QUOTE_CACHE[code] = (ts, quote)
+                    result[code] = quote
+        except Exception as e:
+            logger.debug(f"东财批量行情获取失败 ({len(codes)} 只): {e}")
+        return result
+
     async def _quote_from_sina(self, code: str) -> Optional[Dict]:
         """从新浪获取个股实时行情（东财的备选）"""
         symbol = self._sina_symbol(code)
@@ -359,6 +495,26 @@ class EastmoneyAPI:
             _QUOTE_CACHE[cache_key] = (time.time(), result)
         return result
 
+    async def get_kline_closes(self, code: str, klt: str = "101", limit: int = 100) -> np.ndarray:
+        """只取收盘价序列（含 60s 缓存）
+
+        返回一维只读 float64 数组，按时间升序，与 get_kline_data 同源同缓存；
+        无数据时返回空数组。需要原地运算时请先 copy()。只需要收盘价的调用方（如波动率计算）不必再遍历 K 线 dict。
+        """
+        cache_key = f"kline_close_{code}_{klt}_{limit}"
+        now = time.time()
+        if cache_key in _QUOTE_CACHE:
+            ts, cached = _QUOTE_CACHE[cache_key]
+            if now - ts < _CACHE_TTL:
+                return cached
+
+        klines = await self.get_kline_data(code, klt, limit) or []
+        closes = np.fromiter((k["close"] for k in klines), dtype=np.float64, count=len(klines))
+        closes.flags.writeable = False   # 缓存内的数组由多个调用方共享，禁止原地修改
+        if closes.size:
+            _QUOTE_CACHE[cache_key] = (time.time(), closes)
+        return closes
+
     def _sina_symbol(self, code: str) -> str:
         """转换股票代码为新浪格式：sz000791 / sh600519"""
         pure = code.split(".")[0]
@@ -390,8 +546,7 @@ class EastmoneyAPI:
                     text = await resp.text()
                     if not text or text.strip() == 'null':
                         return []
-                    import json as _json
-                    data = _json.loads(text)
+                    data = json.loads(text)
                     if not isinstance(data, list):
                         return []
                     result = []
@@ -683,7 +838,7 @@ class EastmoneyAPI:
                     "inflow_rate": 0,
                 })
             # 按涨跌幅排序
-            result.sort(key=lambda x: x["change_pct"], reverse=True)
+            result.sort(key=itemgetter("change_pct"), reverse=True)
             return result
         except Exception as e:
             logger.warning(f"新浪板块排行失败: {e}")
@@ -867,7 +1022,11 @@ class EastmoneyAPI:
         return []
 
     async def get_market_flow(self) -> Dict:
-        """获取大盘资金流向"""
+        """获取大盘资金流向（60s 缓存，并发请求合并）"""
+        return await _cached_market_call("market_flow", self._fetch_market_flow)
+
+    async def _fetch_market_flow(self) -> Dict:
+        """实际请求大盘资金流向"""
         url = (f"https://push2.eastmoney.com/api/qt/stock/fflow/kline/get"
                f"?secid=1.000001&fields1=f1,f2,f3,f7"
                f"&fields2=f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61,f62,f63,f64,f65"
@@ -976,7 +1135,11 @@ class EastmoneyAPI:
         return await self.get_sector_ranking(sector_type)
 
     async def get_market_stats(self) -> Dict:
-        """获取市场涨跌统计（带 host fallback）"""
+        """获取市场涨跌统计（60s 缓存，并发请求合并）"""
+        return await _cached_market_call("market_stats", self._fetch_market_stats)
+
+    async def _fetch_market_stats(self) -> Dict:
+        """实际请求市场涨跌统计（带 host fallback）"""
         path_and_query = (f"/api/qt/clist/get"
                           f"?pn=1&pz=1&po=1&np=1&ut={self.ut}&fltt=2&invt=2"
                           f"&fid=f3&fs=m:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23"
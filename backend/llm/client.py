@@ -6,11 +6,13 @@ LLM Client - 封装 Anthropic SDK 调用，支持 Pydantic 结构化输出
 - ANTHROPIC_OAUTH_TOKEN: Claude Code Max OAuth token（通过 OpenClaw，需要特殊 headers）
 """
 import asyncio
+import hashlib
 import json
 import time
 import threading
 import logging
 import os
+import random
 from typing import Type, TypeVar, Optional, Callable
 from pydantic import BaseModel
 import anthropic
@@ -37,6 +39,15 @@ _LAST_CALL_TIME = 0.0
 _RATE_LOCK = threading.Lock()
 _MIN_INTERVAL = 0.3  # 真正并发后可以更激进（线程池 + semaphore 已限流）
 
+# 结构化输出的 prompt 缓存：相同 (model, schema, system, prompt) 在 TTL 内直接复用结果
+_PROMPT_CACHE: dict = {}      # {key: (timestamp, result)}
+_PROMPT_INFLIGHT: dict = {}   # {key: asyncio.Future}，合并相同 prompt 的并发调用
+_PROMPT_CACHE_TTL = 60
+_PROMPT_CACHE_MAX = 512
+
+# tool 定义缓存：JSON schema 只在每个 Pydantic 模型首次调用时生成一次
+_TOOL_CACHE: dict = {}   # {pydantic_model: tool dict}
+
 
 def _rate_limit_wait():
     """确保 LLM 调用之间有最小间隔"""
@@ -49,6 +60,20 @@ def _rate_limit_wait():
         _LAST_CALL_TIME = time.time()
 
 
+def _retry_wait(error: Exception, attempt: int, cap: float = 15.0) -> float:
+    """
+    重试等待秒数：优先使用服务端 Retry-After，否则指数退避 + 抖动。
+    上限 cap（默认 15s，16 个 agent 叠加等待会超时）。
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), cap)
+        except (TypeError, ValueError):
+            pass
+    return min(2 ** (attempt + 1), cap) * random.uniform(0.5, 1.0)   # ~2s, 4s, 8s
+
+
 def _create_client() -> anthropic.Anthropic:
     """创建 Anthropic client，自动检测认证方式"""
     import os
@@ -105,17 +130,13 @@ def call_llm(
     调用 Anthropic LLM，返回 Pydantic 结构化输出（tool_use 模式）。
     内置全局信号量防止并发超限，智能 429 退避。
     """
-    tool_name = f"output_{pydantic_model.__name__.lower()}"
-    tool_schema = _clean_json_schema(pydantic_model.model_json_schema())
-    tool = {
-        "name": tool_name,
-        "description": f"Output structured {pydantic_model.__name__} data",
-        "input_schema": tool_schema,
-    }
+    tool = _get_tool(pydantic_model)
+    tool_name = tool["name"]
     messages = [{"role": "user", "content": prompt}]
     system = _build_system_prompt(system_prompt)
 
     for attempt in range(max_retries):
+        wait = 0.0
         with _LLM_SEMAPHORE:
             _rate_limit_wait()
             try:
@@ -153,22 +174,32 @@ def call_llm(
                 logger.warning(f"LLM 未返回结构化输出 (attempt {attempt + 1})")
 
             except anthropic.RateLimitError as e:
-                # 429: 指数退避，但上限 15s（原30s太激进，16个agent叠加会超时）
-                wait = min(5 * (attempt + 1), 15)   # 5s, 10s, 15s
-                logger.warning(f"Rate limit 429，等待 {wait}s 后重试... ({attempt+1}/{max_retries})")
-                time.sleep(wait)
+                # 429: 按 Retry-After / 指数退避等待
+                wait = _retry_wait(e, attempt)
+                logger.warning(f"Rate limit 429，等待 {wait:.1f}s 后重试... ({attempt+1}/{max_retries})")
+
+            except (anthropic.APIConnectionError, anthropic.InternalServerError) as e:
+                # 连接错误 / 超时 / 5xx 属于瞬时故障，同样退避重试
+                logger.error(f"API 瞬时错误 (attempt {attempt+1}): {e}")
+                if attempt == max_retries - 1:
+                    break
+                wait = _retry_wait(e, attempt)
 
             except anthropic.APIError as e:
                 logger.error(f"API 错误 (attempt {attempt+1}): {e}")
                 if attempt == max_retries - 1:
                     break
-                time.sleep(5)
+                wait = 5
 
             except Exception as e:
                 logger.error(f"LLM 调用异常 (attempt {attempt+1}): {e}")
                 if attempt == max_retries - 1:
                     break
-                time.sleep(2)
+                wait = 2
+
+        # 退避等待放在信号量之外，不占用并发配额
+        if wait and attempt < max_retries - 1:
+            time.sleep(wait)
 
     if default_factory:
         logger.warning(f"LLM 全部重试失败，返回默认值 ({pydantic_model.__name__})")
@@ -190,6 +221,7 @@ def call_llm_text(
     system = _build_system_prompt(system_prompt)
 
     for attempt in range(max_retries):
+        wait = 0.0
         with _LLM_SEMAPHORE:
             _rate_limit_wait()
             try:
@@ -209,15 +241,17 @@ def call_llm_text(
                         return block.text
                 return ""
 
-            except anthropic.RateLimitError:
-                wait = 30 * (attempt + 1)
-                logger.warning(f"Rate limit 429，等待 {wait}s")
-                time.sleep(wait)
+            except anthropic.RateLimitError as e:
+                wait = _retry_wait(e, attempt, cap=30.0)
+                logger.warning(f"Rate limit 429，等待 {wait:.1f}s")
             except Exception as e:
                 logger.error(f"call_llm_text 错误: {e}")
                 if attempt == max_retries - 1:
                     raise
-                time.sleep(3)
+                wait = 3
+
+        if wait and attempt < max_retries - 1:
+            time.sleep(wait)
 
     return ""
 
@@ -243,6 +277,19 @@ def _parse_json_from_text(text: str, model_class: Type[T]) -> T:
     return model_class.model_validate(json.loads(text))
 
 
+def _get_tool(pydantic_model: Type[BaseModel]) -> dict:
+    """结构化输出的 tool 定义（按模型缓存，避免每次调用重新生成 schema）"""
+    tool = _TOOL_CACHE.get(pydantic_model)
+    if tool is None:
+        tool = {
+            "name": f"output_{pydantic_model.__name__.lower()}",
+            "description": f"Output structured {pydantic_model.__name__} data",
+            "input_schema": _clean_json_schema(pydantic_model.model_json_schema()),
+        }
+        _TOOL_CACHE[pydantic_model] = tool
+    return tool
+
+
 def _clean_json_schema(schema: dict) -> dict:
     defs = schema.pop("$defs", None) or schema.pop("definitions", None)
     if defs:
@@ -267,6 +314,24 @@ def _resolve_refs(obj, defs):
     return obj
 
 
+def _prompt_cache_key(*parts) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b"\x00")
+    return h.digest()
+
+
+def _prompt_cache_put(key: bytes, result: BaseModel):
+    now = time.time()
+    _PROMPT_CACHE[key] = (now, result)
+    if len(_PROMPT_CACHE) > _PROMPT_CACHE_MAX:
+        for k in [k for k, (ts, _) in _PROMPT_CACHE.items() if now - ts >= _PROMPT_CACHE_TTL]:
+            del _PROMPT_CACHE[k]
+        while len(_PROMPT_CACHE) > _PROMPT_CACHE_MAX:
+            del _PROMPT_CACHE[next(iter(_PROMPT_CACHE))]   # 淘汰最早写入的
+
+
 # ── 异步包装：在线程池中执行同步 LLM 调用，不阻塞事件循环 ──────────
 async def acall_llm(
     prompt: str,
@@ -278,18 +343,49 @@ async def acall_llm(
     temperature: float = 0.0,
     max_tokens: int = 1024,
 ) -> T:
-    """call_llm 的异步版本，通过 asyncio.to_thread 在线程池中执行"""
-    return await asyncio.to_thread(
-        call_llm,
-        prompt=prompt,
-        pydantic_model=pydantic_model,
-        system_prompt=system_prompt,
-        model=model,
-        max_retries=max_retries,
-        default_factory=default_factory,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
+    """
+    call_llm 的异步版本，通过 asyncio.to_thread 在线程池中执行。
+    成功结果按 prompt 缓存 60s，相同 prompt 的并发调用只请求一次；
+    失败时的 default_factory 兜底值不缓存。
+    """
+    key = _prompt_cache_key(model, pydantic_model.__name__, temperature, max_tokens,
+                            system_prompt, prompt)
+    hit = _PROMPT_CACHE.get(key)
+    if hit is not None and time.time() - hit[0] < _PROMPT_CACHE_TTL:
+        return hit[1].model_copy(deep=True)
+
+    pending = _PROMPT_INFLIGHT.get(key)
+    if pending is not None:
+        result = await asyncio.shield(pending)
+    else:
+        fut = asyncio.get_running_loop().create_future()
+        _PROMPT_INFLIGHT[key] = fut
+        result = None
+        try:
+            result = await asyncio.to_thread(
+                call_llm,
+                prompt=prompt,
+                pydantic_model=pydantic_model,
+                system_prompt=system_prompt,
+                model=model,
+                max_retries=max_retries,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            _prompt_cache_put(key, result)
+        except Exception as e:
+            if default_factory is None:
+                raise
+            logger.warning(f"LLM 调用失败，返回默认值 ({pydantic_model.__name__}): {e}")
+        finally:
+            _PROMPT_INFLIGHT.pop(key, None)
+            fut.set_result(result)
+
+    if result is None:
+        if default_factory is None:
+            raise RuntimeError(f"LLM 调用失败，已重试 {max_retries} 次")
+        return default_factory()
+    return result.model_copy(deep=True)
 
 
 async def acall_llm_text(
@@ -5,9 +5,12 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import asyncio
+import heapq
+from bisect import bisect_left
 import logging
 import time
-from typing import Dict, List, Any
+from operator import itemgetter
+from typing import Dict, List, Any, Final
 import json
 from datetime import datetime, timedelta
 import uvicorn
@@ -178,22 +181,20 @@ async def get_market_overview():
     """大盘概览（含指数 + 板块 + 市场统计）"""
     try:
         indices = ["000001.SH", "399001.SZ", "399006.SZ"]
-        overview_data = {}
 
-        for index_code in indices:
-            quote = await eastmoney.get_quote(index_code)
-            overview_data[index_code] = quote
-
-        # 并行获取板块和市场统计
-        import asyncio as _aio
-        market_stats_task = _aio.create_task(eastmoney.get_market_stats())
-        sectors_task = _aio.create_task(eastmoney.get_sector_ranking())
-
-        market_stats = await market_stats_task
-        try:
-            sectors = await sectors_task
-        except Exception:
+        # 指数行情、市场统计、板块排行互不依赖，全部并发请求
+        *quotes, market_stats, sectors = await asyncio.gather(
+            *(eastmoney.get_quote(index_code) for index_code in indices),
+            eastmoney.get_market_stats(),
+            eastmoney.get_sector_ranking(),
+            return_exceptions=True,
+        )
+        for res in (*quotes, market_stats):
+            if isinstance(res, Exception):
+                raise res
+        if isinstance(sectors, Exception):
             sectors = []
+        overview_data = dict(zip(indices, quotes))
 
         return {
             "success": True,
@@ -242,6 +243,10 @@ async def get_stock_kline(code: str, period: str = "1d", count: int = 100):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 全量分析默认标的（模块级常量，每次请求只拷贝成 list 交给 Agent）
+_DEFAULT_TARGETS: Final = ("000001", "600036", "000858", "600519", "000002")
+
+
 @app.get("/api/analysis/run")
 async def run_full_analysis():
     """
@@ -254,7 +259,7 @@ async def run_full_analysis():
         
         # 准备分析数据
         market_data = {
-            "target_stocks": ["000001", "600036", "000858", "600519", "000002"],
+            "target_stocks": list(_DEFAULT_TARGETS),
         }
         
         # Step 1: 并发运行所有分析 Agent（除 PortfolioManager）
@@ -353,6 +358,11 @@ async def get_agent_status():
     }
 
 
+# 主力净流入分档：(-∞,0] → 0，(0,1亿] → 0.5，(1亿,5亿] → 1.5，>5亿 → 3.0
+_INFLOW_THRESHOLDS: Final = (0, 1e8, 5e8)
+_INFLOW_POINTS: Final = (0.0, 0.5, 1.5, 3.0)
+
+
 def _quant_prescore(stock: Dict[str, Any]) -> float:
     """
     两阶段筛选 Phase-1：纯量化预评分（无 LLM），用于快速缩小候选池。
@@ -372,9 +382,7 @@ def _quant_prescore(stock: Dict[str, Any]) -> float:
         score += 0.5
 
     # 主力净流入（越大越好）
-    if inflow > 5e8:   score += 3.0
-    elif inflow > 1e8: score += 1.5
-    elif inflow > 0:   score += 0.5
+    score += _INFLOW_POINTS[bisect_left(_INFLOW_THRESHOLDS, inflow)]
 
     # PE 合理区间（5-40x）
     if pe and 5 < pe < 40:
@@ -444,7 +452,6 @@ async def _do_market_picks(body: dict):
         # ════════════════════════════════════════════════════════════
         # Phase 1: 并行获取两路候选
         # ════════════════════════════════════════════════════════════
-        import asyncio as _aio
 
         async def _get_sector_candidates():
             """热门板块路径：Top3板块 → 成分股"""
@@ -471,7 +478,7 @@ async def _do_market_picks(body: dict):
             return eligible
 
         # 并行获取两路候选
-        (sector_candidates, top_sector), market_candidates = await _aio.gather(
+        (sector_candidates, top_sector), market_candidates = await asyncio.gather(
             _get_sector_candidates(),
             _get_market_candidates(),
         )
@@ -483,17 +490,15 @@ async def _do_market_picks(body: dict):
         # Phase 2: 量化预筛 → 去重合并 → 选出最终候选
         # ════════════════════════════════════════════════════════════
 
-        # 板块候选：量化预筛取前3
+        # 板块候选：量化预筛取前3（nlargest 只维护 top-k，与排序后切片结果一致）
         for s in sector_candidates:
             s["_prescore"] = _quant_prescore(s)
-        sector_candidates.sort(key=lambda x: x["_prescore"], reverse=True)
-        sector_finalists = sector_candidates[:3]
+        sector_finalists = heapq.nlargest(3, sector_candidates, key=itemgetter("_prescore"))
 
         # 全A股候选：量化预筛取前5
         for s in market_candidates:
             s["_prescore"] = _quant_prescore(s)
-        market_candidates.sort(key=lambda x: x["_prescore"], reverse=True)
-        master_finalists = market_candidates[:5]
+        master_finalists = heapq.nlargest(5, market_candidates, key=itemgetter("_prescore"))
 
         # 合并去重（code 为 key，全A股路径优先保留更多信息）
         all_candidates_map: Dict[str, dict] = {}
@@ -526,7 +531,7 @@ async def _do_market_picks(body: dict):
             warmup.append(eastmoney_api.get_kline_data(code, "101", 60))
         warmup.append(eastmoney_api.get_sector_ranking())
         warmup.append(eastmoney_api.get_market_stats())
-        warm_results = await _aio.gather(*warmup, return_exceptions=True)
+        warm_results = await asyncio.gather(*warmup, return_exceptions=True)
         warm_fail = sum(1 for r in warm_results if isinstance(r, Exception))
         if warm_fail:
             logger.warning(f"market-picks 缓存预热{warm_fail}个失败")
@@ -584,13 +589,20 @@ async def _do_market_picks(body: dict):
         if not all_scored:
             raise HTTPException(status_code=503, detail="所有候选股分析为空")
 
+        # 一次遍历按来源拆分候选（同一只股票可能同时出现在两路）
+        sector_scored: List[Dict[str, Any]] = []
+        master_scored: List[Dict[str, Any]] = []
+        for s in all_scored:
+            if s["code"] in sector_codes:
+                sector_scored.append(s)
+            if s["code"] in master_codes:
+                master_scored.append(s)
+
         # sector_pick：仅从板块候选中选 LLM 得分最高
-        sector_scored = [s for s in all_scored if s["code"] in sector_codes]
-        sector_pick = max(sector_scored, key=lambda x: x["score"]) if sector_scored else all_scored[0]
+        sector_pick = max(sector_scored, key=itemgetter("score")) if sector_scored else all_scored[0]
 
         # master_pick：从全A股候选中选综合得分最高
         #   综合得分 = LLM score × 0.6 + 量化预评分 × 0.2 + 净流入加分 × 0.2
-        master_scored = [s for s in all_scored if s["code"] in master_codes]
         if not master_scored:
             master_scored = all_scored  # fallback
 
@@ -604,7 +616,7 @@ async def _do_market_picks(body: dict):
                 + inflow_score * 0.2,
                 2
             )
-        master_pick = max(master_scored, key=lambda x: x["composite"])
+        master_pick = max(master_scored, key=itemgetter("composite"))
 
         top_sector_names = list({s.get("_sector_name", "全A股") for s in all_finalists})
 
@@ -653,7 +665,6 @@ async def analyze_holdings(body: dict):
         logger.info(f"开始分析持仓: {target_stocks}")
 
         # ── 预热缓存：并发拉取行情+K线+市场数据，后续16个Agent直接命中缓存 ──
-        import asyncio as _aio
         warmup_tasks = []
         for code in target_stocks:
             warmup_tasks.append(eastmoney_api.get_stock_quote(code))
@@ -661,7 +672,7 @@ async def analyze_holdings(body: dict):
             warmup_tasks.append(eastmoney_api.get_kline_data(code, "101", 60))   # 风险管理用
         warmup_tasks.append(eastmoney_api.get_market_stats())    # 情绪分析用
         warmup_tasks.append(eastmoney_api.get_sector_ranking())  # 板块数据用
-        warm_results = await _aio.gather(*warmup_tasks, return_exceptions=True)
+        warm_results = await asyncio.gather(*warmup_tasks, return_exceptions=True)
         failed = [r for r in warm_results if isinstance(r, Exception)]
         if failed:
             logger.warning(f"缓存预热部分失败（{len(failed)}个），将降级运行: {failed[0]}")
@@ -79,6 +79,27 @@ class BatchSignals(BaseModel):
             return s  # 无法解析，返回原始字符串
 
 
+class MultiPersonaSignals(BaseModel):
+    """多人设合并输出：一次 LLM 调用返回所有投资大师人设的批量信号"""
+    personas: Dict[str, BatchSignals] = Field(description="人设名称到该人设批量信号的映射")
+
+    @classmethod
+    def model_json_schema(cls, **kwargs):
+        """确保 JSON schema 中 personas 是 required（避免 LLM 返回空对象）"""
+        schema = super().model_json_schema(**kwargs)
+        schema.setdefault("required", [])
+        if "personas" not in schema["required"]:
+            schema["required"].append("personas")
+        return schema
+
+    @field_validator("personas", mode="before")
+    @classmethod
+    def parse_personas_if_string(cls, v):
+        if isinstance(v, str):
+            v = BatchSignals._try_parse_json(v)
+        return v if isinstance(v, dict) else {}
+
+
 class PortfolioOutput(BaseModel):
     """Portfolio Manager 的完整输出"""
     decisions: Dict[str, PortfolioDecision] = Field(description="股票代码到决策的映射")
@@ -5,7 +5,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, asdict
 import json
-import numpy as np
 
 from .signal import Signal, SignalType
 
@@ -75,8 +74,8 @@ class Analysis:
     
     def get_consensus_signal(self) -> tuple[SignalType, float]:
         """获取一致性信号"""
-        buy_score = 0
-        sell_score = 0
+        # 按信号累加置信度：一次 dict 查找代替 if/elif 字符串比较链
+        scores = {'BUY': 0, 'SELL': 0}
         total_confidence = 0
         
         for agent_result in self.analyses.values():
@@ -85,12 +84,10 @@ class Analysis:
                 confidence = agent_result.get('confidence', 0.5)
                 
                 total_confidence += confidence
-                
-                if signal == 'BUY':
-                    buy_score += confidence
-                elif signal == 'SELL':
-                    sell_score += confidence
+                if signal in scores:
+                    scores[signal] += confidence
         
+        buy_score, sell_score = scores['BUY'], scores['SELL']
         if buy_score > sell_score and buy_score > 0.6:
             return SignalType.BUY, buy_score / len(self.analyses)
         elif sell_score > buy_score and sell_score > 0.6:
@@ -194,30 +191,30 @@ class AnalysisManager:
         latest = self.get_latest_analysis()
         recent_analyses = self.get_analysis_by_timeframe(24)  # 最近24小时
         
-        # 信号统计
-        recent_signals = []
-        for analysis in recent_analyses:
-            recent_signals.extend(analysis.signals)
-        
+        # 信号统计（直接遍历各次分析的信号，累加计数与置信度，不拼接中间列表）
         signal_stats = {
-            'total': len(recent_signals),
+            'total': 0,
             'by_type': {'BUY': 0, 'SELL': 0, 'HOLD': 0},
             'by_strategy': {},
             'avg_confidence': 0.0
         }
         
         total_confidence = 0
-        for signal in recent_signals:
-            signal_stats['by_type'][signal.signal_type.value] += 1
-            
-            if signal.strategy not in signal_stats['by_strategy']:
-                signal_stats['by_strategy'][signal.strategy] = 0
-            signal_stats['by_strategy'][signal.strategy] += 1
-            
-            total_confidence += signal.confidence
+        signal_count = 0
+        for analysis in recent_analyses:
+            for signal in analysis.signals:
+                signal_stats['by_type'][signal.signal_type.value] += 1
+                
+                if signal.strategy not in signal_stats['by_strategy']:
+                    signal_stats['by_strategy'][signal.strategy] = 0
+                signal_stats['by_strategy'][signal.strategy] += 1
+                
+                total_confidence += signal.confidence
+                signal_count += 1
         
-        if recent_signals:
-            signal_stats['avg_confidence'] = total_confidence / len(recent_signals)
+        signal_stats['total'] = signal_count
+        if signal_count:
+            signal_stats['avg_confidence'] = total_confidence / signal_count
         
         # 市场趋势分析
         market_trend = "中性"
@@ -254,19 +251,24 @@ class AnalysisManager:
         
         consensus_signal, confidence = latest.get_consensus_signal()
         
-        # 计算一致性程度
-        signals = []
+        # 计算一致性程度：一次遍历同时统计各信号票数和置信度
+        signal_counts = {}
         confidences = []
         
         for agent_result in latest.analyses.values():
             if isinstance(agent_result, dict):
-                signals.append(agent_result.get('signal', 'HOLD'))
+                signal = agent_result.get('signal', 'HOLD')
+                signal_counts[signal] = signal_counts.get(signal, 0) + 1
                 confidences.append(agent_result.get('confidence', 0.5))
         
         # 一致性得分
-        signal_counts = {signal: signals.count(signal) for signal in set(signals)}
         max_count = max(signal_counts.values()) if signal_counts else 0
-        consensus_ratio = max_count / len(signals) if signals else 0
+        consensus_ratio = max_count / len(confidences) if confidences else 0
+        
+        # 分析师数量只有个位数到十几个，纯 Python 计算比 np.mean/np.std 的数组分配和 ufunc 调度更快
+        n = len(confidences)
+        avg_confidence = sum(confidences) / n if n else 0.0
+        confidence_std = (sum((c - avg_confidence) ** 2 for c in confidences) / n) ** 0.5 if n > 1 else 0.0
         
         return {
             'consensus_signal': consensus_signal.value,
@@ -274,6 +276,6 @@ class AnalysisManager:
             'consensus_ratio': consensus_ratio,
             'agent_count': len(latest.analyses),
             'signal_breakdown': signal_counts,
-            'avg_confidence': np.mean(confidences) if confidences else 0.0,
-            'confidence_std': np.std(confidences) if confidences else 0.0
+            'avg_confidence': avg_confidence,
+            'confidence_std': confidence_std
         }
\ No newline at end of file
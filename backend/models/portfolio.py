@@ -1,3 +1,7 @@
+import heapq
+from operator import attrgetter
+
+import numpy as np
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 from datetime import datetime
@@ -100,15 +104,20 @@ class Portfolio(BaseModel):
         
     def update_portfolio_stats(self):
         """更新组合统计"""
-        self.market_value = sum(pos.market_value for pos in self.positions)
-        self.total_value = self.cash + self.market_value
+        # 一次遍历同时累计市值和持仓成本
+        market_value = 0.0
+        total_cost = 0.0
+        for pos in self.positions:
+            market_value += pos.market_value
+            total_cost += pos.quantity * pos.avg_cost
+        self.market_value = market_value
+        self.total_value = total_value = self.cash + market_value
         
         # 计算权重
         for pos in self.positions:
-            pos.weight = pos.market_value / self.total_value if self.total_value > 0 else 0
+            pos.weight = pos.market_value / total_value if total_value > 0 else 0
             
         # 计算总盈亏
-        total_cost = sum(pos.quantity * pos.avg_cost for pos in self.positions)
         self.total_pnl = self.market_value - total_cost
         self.total_pnl_pct = (self.total_pnl / total_cost) if total_cost > 0 else 0
         
@@ -127,7 +136,8 @@ class Portfolio(BaseModel):
         
     def get_top_positions(self, n: int = 5) -> List[Position]:
         """获取前N大持仓"""
-        return sorted(self.positions, key=lambda x: x.market_value, reverse=True)[:n]
+        # 只取前 N 个，用堆做部分排序：O(P log N) 而非全量排序 O(P log P)
+        return heapq.nlargest(n, self.positions, key=attrgetter("market_value"))
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -215,40 +225,34 @@ class PerformanceMetrics(BaseModel):
         if len(nav_history) < 2:
             return
             
-        # 计算日收益率
-        returns = [(nav_history[i] / nav_history[i-1] - 1) for i in range(1, len(nav_history))]
+        # 计算日收益率（整段向量计算，不逐日循环）
+        nav = np.asarray(nav_history, dtype=np.float64)
+        returns = nav[1:] / nav[:-1] - 1
         
         # 基本收益指标
         self.total_return = nav_history[-1] / nav_history[0] - 1
         days = len(returns)
         self.annual_return = (1 + self.total_return) ** (252 / days) - 1 if days > 0 else 0
-        self.daily_return_avg = sum(returns) / len(returns) if returns else 0
+        self.daily_return_avg = float(returns.mean()) if days else 0
         
         # 风险指标
-        import numpy as np
-        if returns:
-            self.volatility = np.std(returns) * np.sqrt(252)  # 年化波动率
+        if days:
+            self.volatility = returns.std() * np.sqrt(252)  # 年化波动率
             self.var_95 = np.percentile(returns, 5)  # 95% VaR
             
-            # 最大回撤
-            peak = nav_history[0]
-            max_dd = 0
-            for nav in nav_history:
-                if nav > peak:
-                    peak = nav
-                dd = (peak - nav) / peak
-                max_dd = max(max_dd, dd)
-            self.max_drawdown = max_dd
+            # 最大回撤：累计最大值即历史峰值，一次向量计算
+            peak = np.maximum.accumulate(nav)
+            self.max_drawdown = float(((peak - nav) / peak).max())
             
             # 夏普比率（假设无风险利率为3%）
             risk_free_rate = 0.03 / 252  # 日无风险利率
-            excess_returns = [r - risk_free_rate for r in returns]
+            excess_returns = returns - risk_free_rate
             if np.std(excess_returns) > 0:
                 self.sharpe_ratio = np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(252)
                 
             # 索提诺比率
-            downside_returns = [r for r in excess_returns if r < 0]
-            if downside_returns and np.std(downside_returns) > 0:
+            downside_returns = excess_returns[excess_returns < 0]
+            if downside_returns.size and np.std(downside_returns) > 0:
                 self.sortino_ratio = np.mean(excess_returns) / np.std(downside_returns) * np.sqrt(252)
                 
             # 卡玛比率
@@ -257,13 +261,12 @@ class PerformanceMetrics(BaseModel):
                 
         # 基准比较
         if benchmark_history and len(benchmark_history) == len(nav_history):
-            benchmark_returns = [(benchmark_history[i] / benchmark_history[i-1] - 1) 
-                               for i in range(1, len(benchmark_history))]
+            benchmark = np.asarray(benchmark_history, dtype=np.float64)
+            benchmark_returns = benchmark[1:] / benchmark[:-1] - 1
             self.benchmark_return = benchmark_history[-1] / benchmark_history[0] - 1
             
-            if benchmark_returns and returns:
+            if days:
                 # 计算Alpha和Beta
-                import numpy as np
                 covariance = np.cov(returns, benchmark_returns)[0][1]
                 benchmark_variance = np.var(benchmark_returns)
                 
@@ -272,6 +275,6 @@ class PerformanceMetrics(BaseModel):
                     self.alpha = self.daily_return_avg - (self.beta * np.mean(benchmark_returns))
                     
                 # 信息比率
-                active_returns = [returns[i] - benchmark_returns[i] for i in range(len(returns))]
-                if active_returns and np.std(active_returns) > 0:
+                active_returns = returns - benchmark_returns
+                if np.std(active_returns) > 0:
                     self.information_ratio = np.mean(active_returns) / np.std(active_returns) * np.sqrt(252)
\ No newline at end of file
@@ -23,7 +23,7 @@ class SignalPriority(Enum):
     URGENT = 4
 
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
     """交易信号模型"""
     stock_code: str                    # 股票代码
@@ -228,10 +228,11 @@ class SignalManager:
         """获取信号统计"""
         all_signals = self.signal_history
         active_signals = self.get_active_signals()
-        executed_signals = [s for s in all_signals if s.executed]
         
-        # 按策略统计
+        # 按策略统计（同一次遍历中累计执行数与各信号类型数）
         strategy_stats = {}
+        executed_count = 0
+        type_counts = {SignalType.BUY: 0, SignalType.SELL: 0, SignalType.HOLD: 0}
         for signal in all_signals:
             strategy = signal.strategy
             if strategy not in strategy_stats:
@@ -246,6 +247,7 @@ class SignalManager:
             stats = strategy_stats[strategy]
             stats['total'] += 1
             stats['avg_confidence'] += signal.confidence
+            type_counts[signal.signal_type] += 1
             
             if signal.signal_type == SignalType.BUY:
                 stats['buy'] += 1
@@ -254,6 +256,7 @@ class SignalManager:
             
             if signal.executed:
                 stats['executed'] += 1
+                executed_count += 1
         
         # 计算平均置信度
         for stats in strategy_stats.values():
@@ -263,12 +266,12 @@ class SignalManager:
         return {
             'total_signals': len(all_signals),
             'active_signals': len(active_signals),
-            'executed_signals': len(executed_signals),
-            'execution_rate': len(executed_signals) / len(all_signals) if all_signals else 0,
+            'executed_signals': executed_count,
+            'execution_rate': executed_count / len(all_signals) if all_signals else 0,
             'strategy_breakdown': strategy_stats,
             'signal_types': {
-                'buy': len([s for s in all_signals if s.signal_type == SignalType.BUY]),
-                'sell': len([s for s in all_signals if s.signal_type == SignalType.SELL]),
-                'hold': len([s for s in all_signals if s.signal_type == SignalType.HOLD])
+                'buy': type_counts[SignalType.BUY],
+                'sell': type_counts[SignalType.SELL],
+                'hold': type_counts[SignalType.HOLD]
             }
         }
\ No newline at end of file
@@ -108,6 +108,8 @@ class MultiFactorStrategy:
             highs = df['high'].astype(float)
             lows = df['low'].astype(float)
             opens = df['open'].astype(float)
+            # 日收益率在质量因子与风险得分中共用，只计算一次
+            returns = prices.pct_change().dropna()
             
             # 计算各类因子得分
             factor_scores = {}
@@ -124,7 +126,7 @@ class MultiFactorStrategy:
             factor_scores['value'] = self._calculate_value_factors(stock_data)
             
             # 4. 质量因子 (简化版)
-            factor_scores['quality'] = self._calculate_quality_factors(prices, volumes)
+            factor_scores['quality'] = self._calculate_quality_factors(prices, volumes, returns)
             
             # 5. 情绪因子
             factor_scores['sentiment'] = self._calculate_sentiment_factors(stock_data, market_data)
@@ -137,7 +139,7 @@ class MultiFactorStrategy:
             )
             
             # 风险调整
-            risk_score = self._calculate_risk_score(prices, volumes)
+            risk_score = self._calculate_risk_score(prices, volumes, returns)
             adjusted_score = total_score * (1 - risk_score * 0.3)  # 风险折扣
             
             return {
@@ -291,13 +293,15 @@ class MultiFactorStrategy:
             print(f"计算价值因子失败: {e}")
             return 50
     
-    def _calculate_quality_factors(self, prices: pd.Series, volumes: pd.Series) -> float:
+    def _calculate_quality_factors(self, prices: pd.Series, volumes: pd.Series,
+                                   returns: pd.Series) -> float:
         """
         计算质量因子得分（简化版）
         
         Args:
             prices: 价格序列
             volumes: 成交量序列
+            returns: 日收益率序列
             
         Returns:
             float: 质量因子得分 (0-100)
@@ -306,7 +310,6 @@ class MultiFactorStrategy:
         
         try:
             # 价格稳定性（波动率的倒数）
-            returns = prices.pct_change().dropna()
             if len(returns) > 10:
                 volatility = returns.std()
                 stability_score = max(0, 100 - volatility * 1000)
@@ -370,19 +373,20 @@ class MultiFactorStrategy:
             print(f"计算情绪因子失败: {e}")
             return 50
     
-    def _calculate_risk_score(self, prices: pd.Series, volumes: pd.Series) -> float:
+    def _calculate_risk_score(self, prices: pd.Series, volumes: pd.Series,
+                              returns: pd.Series) -> float:
         """
         计算风险得分
         
         Args:
             prices: 价格序列
             volumes: 成交量序列
+            returns: 日收益率序列
             
         Returns:
             float: 风险得分 (0-1, 越高越有风险)
         """
         try:
-            returns = prices.pct_change().dropna()
             if len(returns) < 10:
                 return 0.5
                 
@@ -7,7 +7,9 @@ import pandas as pd
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 import asyncio
+import heapq
 from collections import defaultdict
+from operator import itemgetter
 
 from models.signal import Signal, SignalType
 from utils.indicators import calculate_sma, calculate_rsi, calculate_momentum
@@ -300,15 +302,19 @@ class SectorRotationStrategy:
         # 识别强势和弱势板块
         strong_sectors = []
         weak_sectors = []
+        # 前30% / 后30% 的排名分界只算一次
+        n = len(sorted_sectors)
+        strong_cutoff = n * 0.3
+        weak_cutoff = n * 0.7
         
         for i, (sector, metrics) in enumerate(sorted_sectors):
             strength_score = metrics['strength_score']
             
             # 前30%为强势板块
-            if i < len(sorted_sectors) * 0.3 and strength_score > 60:
+            if i < strong_cutoff and strength_score > 60:
                 strong_sectors.append((sector, metrics))
             # 后30%为弱势板块
-            elif i >= len(sorted_sectors) * 0.7 and strength_score < 40:
+            elif i >= weak_cutoff and strength_score < 40:
                 weak_sectors.append((sector, metrics))
         
         # 生成轮动信号
@@ -370,11 +376,12 @@ class SectorRotationStrategy:
                 print(f"计算股票{stock_code}评分失败: {e}")
                 continue
         
-        # 按评分排序，选择前几名
-        stock_scores.sort(key=lambda x: x[1], reverse=(signal_type == SignalType.BUY))
+        # 按评分只取前5名（买入取最高、卖出取最低；与排序后切片结果一致，无需整表排序）
+        pick = heapq.nlargest if signal_type == SignalType.BUY else heapq.nsmallest
+        top_scores = pick(5, stock_scores, key=itemgetter(1))
         
         # 生成信号（最多选择板块内前5只股票）
-        for i, (stock_code, stock_score, current_price) in enumerate(stock_scores[:5]):
+        for i, (stock_code, stock_score, current_price) in enumerate(top_scores):
             # 根据个股在板块内的排名调整置信度
             rank_bonus = (5 - i) * 0.02
             adjusted_confidence = min(0.95, base_confidence + rank_bonus)
@@ -7,10 +7,16 @@ class TechnicalIndicators:
     
     @staticmethod
     def sma(data: np.ndarray, period: int) -> np.ndarray:
-        """简单移动平均线"""
+        """简单移动平均线（前缀和差分，一次 cumsum 得到所有窗口均值）"""
         if len(data) < period:
             return np.array([])
-        return np.array(pd.Series(data).rolling(window=period).mean().dropna())
+        arr = np.asarray(data, dtype=float)
+        if np.isnan(arr).any():
+            # 含缺失值时保持 rolling + dropna 的语义（跳过含 NaN 的窗口）
+            return np.array(pd.Series(arr).rolling(window=period).mean().dropna())
+        csum = np.cumsum(arr)
+        csum = np.concatenate(([0.0], csum))
+        return (csum[period:] - csum[:-period]) / period
     
     @staticmethod
     def ema(data: np.ndarray, period: int) -> np.ndarray:
@@ -31,6 +31,8 @@
 """
 import asyncio
 import logging
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
 from typing import Dict, List, Optional, Any
 
 import numpy as np
@@ -53,6 +55,16 @@ MIN_REVERSAL_SCORE = 40
 # Universe 目标规模：全 A 股 ≈ 5300，留余量
 DEFAULT_UNIVERSE_LIMIT = 5500
 
+# ─── 评分档位表（bisect 查表，与逐级 if/elif 完全等价）─────────
+# "x > t" 阶梯：bisect_left(阈值, x) = 严格小于 x 的阈值个数
+BOUNCE_THRESHOLDS,    BOUNCE_POINTS    = (3, 4, 6, 8),     (5, 9, 13, 17, 20)
+GAIN_2D_THRESHOLDS,   GAIN_2D_POINTS   = (2, 6),           (0, 7, 12)
+VOL_RATIO_THRESHOLDS, VOL_RATIO_POINTS = (1.5, 2.0, 3.0),  (4, 8, 12, 18)
+ATR_THRESHOLDS,       ATR_POINTS       = (3, 5),           (0, 6, 12)
+# "x < t" 阶梯：bisect_right(阈值, x) = 小于等于 x 的阈值个数
+DECLINE_7D_THRESHOLDS, DECLINE_7D_POINTS = (-15, -10, -8), (8, 6, 4, 2)
+RSI6_THRESHOLDS,       RSI6_POINTS       = (30, 45),       (10, 3, 0)
+
 
 def _calc_rsi(closes, period: int = 6) -> float:
     """6 周期 RSI"""
@@ -105,26 +117,14 @@ def score_reversal(
 
     # ── 评分项 1：bounce 强度（0-20）─────────────────────────
     score = 0.0
-    if bounce > 8:
-        score += 20
-    elif bounce > 6:
-        score += 17
-    elif bounce > 4:
-        score += 13
-    elif bounce > 3:
-        score += 9
-    else:
-        score += 5
+    score += BOUNCE_POINTS[bisect_left(BOUNCE_THRESHOLDS, bounce)]
 
     # ── 评分项 2：2 日动量（0-12）───────────────────────────
     recent_gain = (
         (closes[-1] - closes[-3]) / closes[-3] * 100
         if len(closes) >= 3 and closes[-3] > 0 else 0.0
     )
-    if recent_gain > 6:
-        score += 12
-    elif recent_gain > 2:
-        score += 7
+    score += GAIN_2D_POINTS[bisect_left(GAIN_2D_THRESHOLDS, recent_gain)]
 
     # ── 评分项 3：7 日跌幅深度（仅加分，不硬过滤）（2-8）────
     decline_7d = (
@@ -132,14 +132,7 @@ def score_reversal(
         if len(closes) >= 8 and closes[-8] > 0 else 0.0
     )
     details["decline_7d"] = round(float(decline_7d), 2)
-    if decline_7d < -15:
-        score += 8
-    elif decline_7d < -10:
-        score += 6
-    elif decline_7d < -8:
-        score += 4
-    else:
-        score += 2
+    score += DECLINE_7D_POINTS[bisect_right(DECLINE_7D_THRESHOLDS, decline_7d)]
 
     # ── 评分项 4：量比 vs MA5（仅加分，不硬过滤）（4-18）────
     if len(volumes) >= 6:
@@ -150,14 +143,7 @@ def score_reversal(
         avg_vol_5d = 0.0
     vol_ratio = float(volumes[-1]) / avg_vol_5d if avg_vol_5d > 0 else 1.0
     details["vol_ratio"] = round(vol_ratio, 2)
-    if vol_ratio > 3.0:
-        score += 18
-    elif vol_ratio > 2.0:
-        score += 12
-    elif vol_ratio > 1.5:
-        score += 8
-    else:
-        score += 4
+    score += VOL_RATIO_POINTS[bisect_left(VOL_RATIO_THRESHOLDS, vol_ratio)]
 
     # ── 评分项 5：当日量 > 昨日量（+6）──────────────────────
     if len(volumes) >= 2 and volumes[-1] > volumes[-2]:
@@ -167,18 +153,12 @@ def score_reversal(
     if highs is not None and lows is not None and len(highs) >= 14:
         atr = float(np.mean(highs[-14:] - lows[-14:]))
         atr_ratio = atr / closes[-1] * 100 if closes[-1] > 0 else 0.0
-        if atr_ratio > 5:
-            score += 12
-        elif atr_ratio > 3:
-            score += 6
+        score += ATR_POINTS[bisect_left(ATR_THRESHOLDS, atr_ratio)]
 
     # ── 评分项 7：RSI6 超卖（0-10）──────────────────────────
     rsi6 = _calc_rsi(closes, 6)
     details["rsi6"] = round(float(rsi6), 1)
-    if rsi6 < 30:
-        score += 10
-    elif rsi6 < 45:
-        score += 3
+    score += RSI6_POINTS[bisect_right(RSI6_THRESHOLDS, rsi6)]
 
     final_score = round(min(100.0, max(0.0, score)), 2)
     return _return(final_score, details)
@@ -303,7 +283,7 @@ async def scan_reversal_candidates(limit: int = DEFAULT_UNIVERSE_LIMIT) -> List[
 
         candidates = sorted(
             [c for c in results if c is not None],
-            key=lambda x: x.reversal_score, reverse=True,
+            key=attrgetter("reversal_score"), reverse=True,
         )
 
         logger.info(